@@ -0,0 +1,263 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tokenizer
+from numeric_array import json_default
+from output_generator import write_output_html
+
+SUMMARY_FILE = "summary.json"
+
+# Entries of the current run, appended as files finish so an interrupted run
+# can be resumed. Folded into the summary and removed once the run completes.
+JOURNAL_FILE = "summary.jsonl"
+
+
+def collect_inputs(source: str, pattern: str = "*.log") -> list[str]:
+    """Resolve a directory or glob pattern into a list of input files.
+
+    Args:
+        source: Directory to scan, or a glob pattern (``**`` is supported).
+        pattern: File pattern used when `source` is a directory.
+
+    Returns:
+        Sorted list of matching file paths.
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, pattern)
+    return sorted(
+        path for path in glob.glob(source, recursive=True) if os.path.isfile(path)
+    )
+
+
+def input_root(source: str) -> str:
+    """Directory that input paths are taken relative to for their outputs.
+
+    This is `source` itself for a directory, otherwise the part of the glob
+    pattern before its first wildcard.
+    """
+    if os.path.isdir(source):
+        return source
+    root = []
+    for part in source.split(os.sep):
+        if glob.has_magic(part):
+            break
+        root.append(part)
+    else:
+        # A plain file path
+        return os.path.dirname(source)
+    if root == [""]:
+        return os.sep
+    return os.sep.join(root) or os.curdir
+
+
+def output_path_for(
+    input_path: str, root: str, output_dir: str, output_format: str
+) -> str:
+    """Mirror the input's location under `root` into `output_dir`."""
+    relative, _ = os.path.splitext(os.path.relpath(input_path, root or os.curdir))
+    return os.path.join(output_dir, f"{relative}.{output_format}")
+
+
+def process_file(
+    input_path: str,
+    output_path: str,
+    output_format: str,
+    max_inline_bytes: int | None = None,
+) -> dict:
+    """Parse one log file and write its JSON or HTML output.
+
+    Runs inside a worker process, so errors are reported in the result
+    instead of being raised.
+
+    Returns:
+        Dictionary with the status, record count, elapsed seconds and error.
+    """
+    start = time.perf_counter()
+    try:
+        with open(input_path, "r") as f:
+            data = f.read()
+
+        result = tokenizer.parse_dict_with_tokenizer(data)
+        os.makedirs(os.path.dirname(output_path) or os.curdir, exist_ok=True)
+        if output_format == "html":
+            write_output_html(result, output_path, max_inline_bytes)
+        else:
+            with open(output_path, "w") as f:
+                json.dump(result, f, indent=2, default=json_default)
+
+        return {
+            "status": "ok",
+            "records": len(result),
+            "seconds": time.perf_counter() - start,
+            "error": None,
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "records": 0,
+            "seconds": time.perf_counter() - start,
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+
+def _load_previous_entries(summary_path: str, journal_path: str) -> dict[str, dict]:
+    entries = {}
+    try:
+        with open(summary_path, "r") as f:
+            summary = json.load(f)
+        entries = {entry["input"]: entry for entry in summary.get("entries", [])}
+    except (OSError, ValueError):
+        pass
+
+    # Files finished by an interrupted run take precedence over the summary
+    try:
+        with open(journal_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line cut short when the run was killed
+                    continue
+                entries[entry["input"]] = entry
+    except OSError:
+        pass
+    return entries
+
+
+def _is_up_to_date(previous_entry: dict | None, entry: dict) -> bool:
+    return (
+        previous_entry is not None
+        and previous_entry["status"] in ("ok", "skipped")
+        and previous_entry["output"] == entry["output"]
+        and previous_entry["size"] == entry["size"]
+        and previous_entry["mtime"] == entry["mtime"]
+        and os.path.exists(entry["output"])
+    )
+
+
+def _write_summary(summary_path: str, entries: list[dict], seconds: float):
+    statuses = [entry["status"] for entry in entries]
+    summary = {
+        "files": len(entries),
+        "processed": statuses.count("ok"),
+        "skipped": statuses.count("skipped"),
+        "failed": statuses.count("error"),
+        "records": sum(entry["records"] for entry in entries),
+        "seconds": seconds,
+        "entries": sorted(entries, key=lambda entry: entry["input"]),
+    }
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def run_batch(
+    source: str,
+    output_dir: str,
+    output_format: str = "json",
+    workers: int | None = None,
+    force: bool = False,
+    pattern: str = "*.log",
+    max_inline_bytes: int | None = None,
+) -> dict:
+    """Convert many log files in parallel, one worker process per file.
+
+    Files are scheduled largest first so the longest jobs start early. Each
+    output mirrors the input's path below the directory or glob root, so
+    files with the same name in different directories do not collide.
+    Inputs whose size and mtime match the previous summary, and whose output
+    still exists, are skipped unless `force` is set. Finished files are
+    recorded as they complete, so an interrupted run resumes where it
+    stopped.
+
+    Args:
+        source: Directory or glob pattern selecting the input files.
+        output_dir: Directory for the per-file outputs and ``summary.json``.
+        output_format: Either ``json`` or ``html``.
+        workers: Number of worker processes. Defaults to the CPU count.
+        force: Reprocess every file even when its output is up to date.
+        pattern: File pattern used when `source` is a directory.
+        max_inline_bytes: Inline budget forwarded to the HTML renderer.
+
+    Returns:
+        The summary that was written to ``summary.json``.
+
+    Raises:
+        ValueError: If two inputs would be written to the same output file.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    journal_path = os.path.join(output_dir, JOURNAL_FILE)
+    if force and os.path.exists(journal_path):
+        os.remove(journal_path)
+    previous = {} if force else _load_previous_entries(summary_path, journal_path)
+
+    root = input_root(source)
+    outputs = {
+        os.path.normpath(summary_path): SUMMARY_FILE,
+        os.path.normpath(journal_path): JOURNAL_FILE,
+    }
+    entries = []
+    pending = []
+    for input_path in collect_inputs(source, pattern):
+        stat = os.stat(input_path)
+        entry = {
+            "input": input_path,
+            "output": output_path_for(input_path, root, output_dir, output_format),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+        output_key = os.path.normpath(entry["output"])
+        if output_key in outputs:
+            raise ValueError(
+                f"{input_path} and {outputs[output_key]} would both be written "
+                f"to {entry['output']}"
+            )
+        outputs[output_key] = input_path
+
+        previous_entry = previous.get(input_path)
+        if _is_up_to_date(previous_entry, entry):
+            entries.append(
+                {
+                    **entry,
+                    "status": "skipped",
+                    "records": previous_entry["records"],
+                    "seconds": 0.0,
+                    "error": None,
+                }
+            )
+        else:
+            pending.append(entry)
+
+    # Largest files first to balance the load across workers
+    pending.sort(key=lambda entry: entry["size"], reverse=True)
+
+    with (
+        ProcessPoolExecutor(max_workers=workers) as executor,
+        open(journal_path, "a") as journal,
+    ):
+        futures = {
+            executor.submit(
+                process_file,
+                entry["input"],
+                entry["output"],
+                output_format,
+                max_inline_bytes,
+            ): entry
+            for entry in pending
+        }
+        for future in as_completed(futures):
+            entry = {**futures[future], **future.result()}
+            entries.append(entry)
+            journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            print(f"[{entry['status']}] {entry['input']} ({entry['seconds']:.2f}s)")
+
+    summary = _write_summary(summary_path, entries, time.perf_counter() - start)
+    os.remove(journal_path)
+    return summary
@@ -0,0 +1,65 @@
+# Thin client for `main.py serve`. It only imports what it needs so it starts
+# quickly and leaves parsing and rendering to the warm server process.
+import json
+import socket
+from argparse import ArgumentParser
+
+
+def request(socket_path: str, command: str, data: str, **options) -> str:
+    """Send raw repr text to the server and return the rendered output.
+
+    Args:
+        socket_path: Path of the server's Unix domain socket.
+        command: Either ``json`` or ``html``.
+        data: Raw repr text to parse.
+        **options: Extra header fields such as ``pair_key`` or ``pair_window``.
+
+    Returns:
+        The rendered JSON or HTML text.
+
+    Raises:
+        RuntimeError: If the server reports an error.
+    """
+    body = data.encode("utf-8")
+    header = {"command": command, "length": len(body), **options}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(header).encode("utf-8") + b"\n" + body)
+        with sock.makefile("rb") as response:
+            response_header = json.loads(response.readline())
+            if response_header["status"] != "ok":
+                raise RuntimeError(response_header["error"])
+            return response.read(response_header["length"]).decode("utf-8")
+
+
+def parse_args():
+    parser = ArgumentParser(description="Send a parse request to `main.py serve`")
+    parser.add_argument("--socket", type=str, required=True)
+    parser.add_argument("--command", choices=["json", "html"], default="json")
+    parser.add_argument("--input", type=str, required=True)
+    parser.add_argument("--output", type=str, required=True)
+    parser.add_argument("--pair-key", type=str, default=None)
+    parser.add_argument("--pair-window", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with open(args.input, "r") as f:
+        data = f.read()
+
+    options = {}
+    if args.pair_key is not None:
+        options["pair_key"] = args.pair_key
+    if args.pair_window is not None:
+        options["pair_window"] = args.pair_window
+
+    output = request(args.socket, args.command, data, **options)
+    with open(args.output, "w") as f:
+        f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import csv
+import json
+from itertools import chain, islice
+from typing import Iterable
+
+from numeric_array import json_default
+
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Column holding, as a JSON object, any key path that was not seen in the sample
+EXTRA_COLUMN = "_extra"
+
+
+def flatten_record(record, prefix: str = "") -> dict:
+    """Flatten nested dictionaries into dotted key paths.
+
+    Lists, tuples, numeric arrays and other values are kept as leaves. A
+    record that is not a dictionary becomes a single ``value`` column.
+    """
+    if not isinstance(record, dict):
+        return {prefix or "value": record}
+
+    flat = {}
+    for key, value in record.items():
+        full_key = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_record(value, full_key))
+        else:
+            flat[full_key] = value
+    return flat
+
+
+def _value_type(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "json"
+
+
+def _merge_types(current: str | None, new: str | None) -> str | None:
+    if current is None or current == new:
+        return new
+    if new is None:
+        return current
+    if {current, new} == {"int", "float"}:
+        return "float"
+    if "json" in (current, new):
+        return "json"
+    return "str"
+
+
+def infer_schema(sample: Iterable) -> dict[str, str]:
+    """Infer the columns and their types from a sample of records.
+
+    Columns keep the order in which they are first seen. Types are one of
+    ``int``, ``float``, ``bool``, ``str`` or ``json``, widened when the sample
+    mixes them. Columns that were only ever null are typed ``str``.
+    """
+    schema = {}
+    for record in sample:
+        for key, value in flatten_record(record).items():
+            schema[key] = _merge_types(schema.get(key), _value_type(value))
+    return {key: value_type or "str" for key, value_type in schema.items()}
+
+
+def format_cell(value) -> str:
+    """Format a value for a CSV cell, with nested values stored as JSON."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (str, int, float)):
+        return str(value)
+    return json.dumps(value, default=json_default)
+
+
+def export_csv(
+    records: Iterable,
+    output_path: str,
+    delimiter: str = ",",
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    schema_path: str | None = None,
+) -> int:
+    """Write records as flattened CSV rows in a single streaming pass.
+
+    The column set is inferred from the first `sample_size` records, so only
+    the sample is held in memory. Key paths that first appear after the sample
+    are written to the trailing ``_extra`` column as a JSON object.
+
+    Args:
+        records: Parsed top-level records, typically from
+            `tokenizer.iter_records_with_tokenizer`.
+        output_path: Path of the CSV file to write.
+        delimiter: Field delimiter, e.g. ``","`` or ``"\\t"``.
+        sample_size: Number of leading records used to infer the schema.
+        schema_path: Optional path to write the inferred column types as JSON.
+
+    Returns:
+        Number of rows written.
+    """
+    records = iter(records)
+    sample = list(islice(records, sample_size))
+    schema = infer_schema(sample)
+
+    if schema_path is not None:
+        with open(schema_path, "w") as f:
+            json.dump(schema, f, indent=2)
+
+    count = 0
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow([*schema, EXTRA_COLUMN])
+
+        for record in chain(sample, records):
+            flat = flatten_record(record)
+            row = [format_cell(flat.pop(key, None)) for key in schema]
+            row.append(format_cell(flat) if flat else "")
+            writer.writerow(row)
+            count += 1
+
+    return count
@@ -1,42 +1,262 @@
 import json
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
-from output_generator import generate_output_html
+from batch import run_batch
+from csv_export import DEFAULT_SAMPLE_SIZE, export_csv
+from numeric_array import json_default
+from output_generator import (
+    DEFAULT_PAIR_KEY,
+    DEFAULT_PAIR_WINDOW,
+    write_output_html,
+)
+from record_diff import diff_files
+from server import serve
+from sqlite_export import DEFAULT_BATCH_SIZE, export_sqlite
+from stats import profile_files
 
 import tokenizer
 
 
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"must be 1 or more, got {number}")
+    return number
+
+
+def probability(value: str) -> float:
+    rate = float(value)
+    if not 0.0 <= rate <= 1.0:
+        raise ArgumentTypeError(f"must be between 0 and 1, got {rate}")
+    return rate
+
+
+def add_selection_arguments(parser: ArgumentParser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--head", type=non_negative_int, default=None, help="Only the first N records"
+    )
+    group.add_argument(
+        "--tail", type=non_negative_int, default=None, help="Only the last N records"
+    )
+    group.add_argument(
+        "--sample",
+        type=probability,
+        default=None,
+        help="Keep each record with this probability, e.g. 0.01",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for --sample")
+
+
+def iter_selected_records(data: str, args, with_spans: bool = False):
+    """Stream the records picked by --head, --tail or --sample, or all of them."""
+    if args.head is not None:
+        return tokenizer.iter_head_records(data, args.head, with_spans)
+    if args.tail is not None:
+        return tokenizer.iter_tail_records(data, args.tail, with_spans)
+    if args.sample is not None:
+        return tokenizer.iter_sample_records(data, args.sample, args.seed, with_spans)
+    return tokenizer.iter_records_with_tokenizer(data, with_spans)
+
+
+def load_selected_records(data: str, args) -> list:
+    if args.head is None and args.tail is None and args.sample is None:
+        return tokenizer.parse_dict_with_tokenizer(data)
+    return list(iter_selected_records(data, args))
+
+
+def load_selected_records_with_positions(data: str, args) -> tuple[list, list]:
+    """Like `load_selected_records`, plus where each record starts and ends."""
+    records = []
+    spans = []
+    for record, span in iter_selected_records(data, args, with_spans=True):
+        records.append(record)
+        spans.append(span)
+    return records, tokenizer.spans_to_positions(data, spans)
+
+
 def parse_args():
     parser = ArgumentParser()
     subparsers = parser.add_subparsers(dest="command")
     parse_parser = subparsers.add_parser("json", help="Parse the input file")
     parse_parser.add_argument("--input", type=str, required=True)
     parse_parser.add_argument("--output", type=str, required=True)
+    add_selection_arguments(parse_parser)
     output_parser = subparsers.add_parser("generate", help="Generate the output file")
     output_parser.add_argument("--input", type=str, required=True)
     output_parser.add_argument("--output", type=str, required=True)
     html_parser = subparsers.add_parser("html", help="Generate the output file")
     html_parser.add_argument("--input", type=str, required=True)
     html_parser.add_argument("--output", type=str, required=True)
+    html_parser.add_argument(
+        "--max-inline-bytes",
+        type=int,
+        default=None,
+        help="Move expandable values larger than this into sidecar files",
+    )
+    html_parser.add_argument(
+        "--pair-key",
+        type=str,
+        default=DEFAULT_PAIR_KEY,
+        help="Dotted key path shared by a task and its task_result",
+    )
+    html_parser.add_argument(
+        "--pair-window",
+        type=positive_int,
+        default=DEFAULT_PAIR_WINDOW,
+        help="Records a task waits for its result before it is shown unmatched",
+    )
+    html_parser.add_argument(
+        "--source-spans",
+        action="store_true",
+        help="Show where each record starts and ends in the input next to its title",
+    )
+    add_selection_arguments(html_parser)
+    batch_parser = subparsers.add_parser(
+        "batch", help="Convert a directory or glob of input files in parallel"
+    )
+    batch_parser.add_argument("--input", type=str, required=True)
+    batch_parser.add_argument("--output", type=str, required=True)
+    batch_parser.add_argument("--format", choices=["json", "html"], default="json")
+    batch_parser.add_argument("--pattern", type=str, default="*.log")
+    batch_parser.add_argument("--workers", type=int, default=None)
+    batch_parser.add_argument(
+        "--force", action="store_true", help="Reprocess up-to-date files"
+    )
+    batch_parser.add_argument("--max-inline-bytes", type=int, default=None)
+    sqlite_parser = subparsers.add_parser(
+        "sqlite", help="Export the parsed records into an indexed SQLite database"
+    )
+    sqlite_parser.add_argument("--input", type=str, required=True)
+    sqlite_parser.add_argument("--output", type=str, required=True)
+    sqlite_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    add_selection_arguments(sqlite_parser)
+    csv_parser = subparsers.add_parser(
+        "csv", help="Export the parsed records as flattened CSV/TSV rows"
+    )
+    csv_parser.add_argument("--input", type=str, required=True)
+    csv_parser.add_argument("--output", type=str, required=True)
+    csv_parser.add_argument(
+        "--delimiter",
+        type=str,
+        default=None,
+        help="Field delimiter. Defaults to a tab for .tsv outputs, a comma otherwise",
+    )
+    csv_parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    csv_parser.add_argument(
+        "--schema", type=str, default=None, help="Write the inferred schema as JSON"
+    )
+    add_selection_arguments(csv_parser)
+    stats_parser = subparsers.add_parser(
+        "stats", help="Profile key paths, types and value statistics"
+    )
+    stats_parser.add_argument("--input", type=str, nargs="+", required=True)
+    stats_parser.add_argument("--output", type=str, required=True)
+    stats_parser.add_argument("--workers", type=int, default=None)
+    diff_parser = subparsers.add_parser(
+        "diff", help="List structural differences between two input files"
+    )
+    diff_parser.add_argument("--old", type=str, required=True)
+    diff_parser.add_argument("--new", type=str, required=True)
+    diff_parser.add_argument("--output", type=str, required=True)
+    diff_parser.add_argument(
+        "--key",
+        type=str,
+        default=None,
+        help="Dotted key path used to align records instead of their position",
+    )
+    diff_parser.add_argument(
+        "--paths-only", action="store_true", help="Omit old and new values"
+    )
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve parse requests on a Unix domain socket"
+    )
+    serve_parser.add_argument("--socket", type=str, required=True)
+    serve_parser.add_argument("--workers", type=int, default=None)
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
 
+    if args.command == "batch":
+        summary = run_batch(
+            args.input,
+            args.output,
+            output_format=args.format,
+            workers=args.workers,
+            force=args.force,
+            pattern=args.pattern,
+            max_inline_bytes=args.max_inline_bytes,
+        )
+        print(
+            f"{summary['processed']} processed, {summary['skipped']} skipped, "
+            f"{summary['failed']} failed in {summary['seconds']:.2f}s"
+        )
+        return
+
+    if args.command == "stats":
+        profile = profile_files(args.input, args.workers)
+        with open(args.output, "w") as f:
+            json.dump(profile.to_dict(), f, indent=2)
+        print(f"Profiled {profile.records} records, {len(profile.keys)} key paths")
+        return
+
+    if args.command == "diff":
+        count = diff_files(
+            args.old, args.new, args.output, args.key, paths_only=args.paths_only
+        )
+        print(f"Found {count} changes")
+        return
+
+    if args.command == "serve":
+        serve(args.socket, args.workers)
+        return
+
     with open(args.input, "r") as f:
         data = f.read()
 
     if args.command == "json":
-        result = tokenizer.parse_dict_with_tokenizer(data)
+        result = load_selected_records(data, args)
         with open(args.output, "w") as f:
-            json.dump(result, f, indent=2)
+            json.dump(result, f, indent=2, default=json_default)
 
     elif args.command == "html":
-        result = tokenizer.parse_dict_with_tokenizer(data)
-        output = generate_output_html(result)
-        with open(args.output, "w") as f:
-            f.write(output)
+        source_positions = None
+        if args.source_spans:
+            result, source_positions = load_selected_records_with_positions(data, args)
+        else:
+            result = load_selected_records(data, args)
+        write_output_html(
+            result,
+            args.output,
+            args.max_inline_bytes,
+            pair_key=args.pair_key,
+            pair_window=args.pair_window,
+            source_positions=source_positions,
+        )
+
+    elif args.command == "sqlite":
+        records = iter_selected_records(data, args)
+        count = export_sqlite(records, args.output, args.batch_size)
+        print(f"Wrote {count} records to {args.output}")
+
+    elif args.command == "csv":
+        delimiter = args.delimiter
+        if delimiter is None:
+            delimiter = "\t" if args.output.endswith(".tsv") else ","
+        records = iter_selected_records(data, args)
+        count = export_csv(
+            records, args.output, delimiter, args.sample_size, args.schema
+        )
+        print(f"Wrote {count} rows to {args.output}")
 
     elif args.command == "generate":
         tokenizer.tokenize_raw(data, args.output)
@@ -0,0 +1,76 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the stdlib fallback is used instead
+    np = None
+
+# Lists shorter than this stay plain Python lists
+NUMERIC_ARRAY_MIN_LENGTH = 16
+
+PREVIEW_SIZE = 8
+
+
+def to_numeric_array(values: list) -> array | None:
+    """Pack a homogeneous list of ints or floats into a compact array.
+
+    Args:
+        values: Parsed list items.
+
+    Returns:
+        An ``array('q')`` for int lists, an ``array('d')`` for float lists, or
+        None if the list is empty, mixed, or has ints outside the int64 range.
+    """
+    if not values:
+        return None
+
+    # `type(...) is` rather than isinstance so booleans are not packed as ints
+    first_type = type(values[0])
+    if first_type is int:
+        if all(type(v) is int for v in values):
+            try:
+                return array("q", values)
+            except OverflowError:
+                return None
+    elif first_type is float:
+        if all(type(v) is float for v in values):
+            return array("d", values)
+
+    return None
+
+
+def numeric_summary(values: array) -> dict:
+    """Compute count, min, max and mean of a non-empty numeric array.
+
+    Uses a zero-copy NumPy view when NumPy is installed.
+    """
+    if np is not None:
+        view = np.frombuffer(
+            values, dtype=np.int64 if values.typecode == "q" else np.float64
+        )
+        return {
+            "count": len(values),
+            "min": view.min().item(),
+            "max": view.max().item(),
+            "mean": view.mean().item(),
+        }
+
+    return {
+        "count": len(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": sum(values) / len(values),
+    }
+
+
+def sample_preview(values: array, size: int = PREVIEW_SIZE) -> list:
+    """Return up to `size` evenly spaced items, always starting with the first."""
+    step = max(1, -(-len(values) // size))
+    return values[::step].tolist()
+
+
+def json_default(obj):
+    """`json.dumps` hook that serializes numeric arrays as plain lists."""
+    if isinstance(obj, array):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
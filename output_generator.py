@@ -1,15 +1,157 @@
+import hashlib
 import json
+import os
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
 
+from numeric_array import json_default, numeric_summary, sample_preview
 
-def generate_output_html(data: list[dict]) -> str:
+PAIR_TYPES = ("task", "task_result")
+
+# Default location of the identifier shared by a task and its result
+DEFAULT_PAIR_KEY = "payload.id"
+
+# Number of records a task waits for its result before it is shown unmatched
+DEFAULT_PAIR_WINDOW = 10000
+
+# Common important fields shown in the summary of each record
+IMPORTANT_KEYS = (
+    "id",
+    "name",
+    "title",
+    "type",
+    "status",
+    "message",
+    "error",
+    "user_query",
+    "query",
+    "response",
+    "result",
+    "timestamp",
+    "time",
+)
+
+CATEGORY_ORDER = ("Text Fields", "Numbers & Booleans", "Arrays", "Objects", "Other")
+
+# Hint of the categories whose hint does not depend on the value's size
+CATEGORY_HINTS = {"Numbers & Booleans": "simple", "Arrays": "array", "Other": "other"}
+
+# Number of distinct record shapes whose smart content layout is cached
+LAYOUT_CACHE_SIZE = 1024
+
+# Characters of each item shown in the preview of a collapsed array
+PREVIEW_ITEM_LENGTH = 100
+
+
+class BlobStore:
+    """Content-addressed sidecar storage for values that exceed the inline budget.
+
+    Each blob is written once as ``<sha256>.js`` inside ``directory``. The file
+    calls ``pyreprLoadBlob`` so the viewer can load it with a plain ``<script>``
+    tag, which also works for pages opened from ``file://``.
+    """
+
+    def __init__(self, directory: str, max_inline_bytes: int):
+        self.directory = directory
+        self.max_inline_bytes = max_inline_bytes
+        self.href_prefix = os.path.basename(os.path.normpath(directory))
+        self._stored: set[str] = set()
+
+    def fits_inline(self, content: str) -> bool:
+        # Every character takes at least one and at most four bytes in UTF-8,
+        # so most values are decided without encoding them.
+        if len(content) > self.max_inline_bytes:
+            return False
+        if len(content) * 4 <= self.max_inline_bytes:
+            return True
+        return len(content.encode("utf-8")) <= self.max_inline_bytes
+
+    def store(self, content: str) -> str:
+        """Write content to its sidecar file (once) and return its digest."""
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if digest in self._stored:
+            return digest
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{digest}.js")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                f.write(
+                    f"pyreprLoadBlob({json.dumps(digest)}, {json.dumps(content)});\n"
+                )
+        self._stored.add(digest)
+        return digest
+
+
+def write_output_html(
+    data: list[dict],
+    output_path: str,
+    max_inline_bytes: int | None = None,
+    pair_key: str = DEFAULT_PAIR_KEY,
+    pair_window: int = DEFAULT_PAIR_WINDOW,
+    source_positions: list[tuple[tuple[int, int], tuple[int, int]]] | None = None,
+):
+    """Render the HTML viewer to a file.
+
+    Args:
+        data: Parsed records to display.
+        output_path: Path of the HTML file to write.
+        max_inline_bytes: When set, expandable bodies larger than this many bytes
+            are moved to ``<output stem>_blobs/`` next to the HTML file.
+        pair_key: Dotted key path identifying a task and its result.
+        pair_window: Records a task waits for its result before being evicted.
+        source_positions: Optional `(line, column)` positions of the first and
+            last character of each record in the input, shown next to its title.
+    """
+    blob_store = None
+    if max_inline_bytes is not None:
+        stem, _ = os.path.splitext(output_path)
+        blob_store = BlobStore(f"{stem}_blobs", max_inline_bytes)
+
+    output = generate_output_html(
+        data,
+        blob_store=blob_store,
+        pair_key=pair_key,
+        pair_window=pair_window,
+        source_positions=source_positions,
+    )
+    with open(output_path, "w") as f:
+        f.write(output)
+
+
+def generate_output_html(
+    data: list[dict],
+    blob_store: BlobStore | None = None,
+    pair_key: str = DEFAULT_PAIR_KEY,
+    pair_window: int = DEFAULT_PAIR_WINDOW,
+    source_positions: list[tuple[tuple[int, int], tuple[int, int]]] | None = None,
+) -> str:
     """Generate HTML output with a collapsible list of JSON representations of dictionaries.
 
+    A ``task`` and its ``task_result`` are shown together when they share the
+    value at `pair_key`, however they are interleaved. Records without that
+    key fall back to pairing a task with the record directly after it.
+
     Args:
         data: List of dictionaries to display as JSON in HTML list.
+        blob_store: Optional sidecar store for bodies that exceed the inline budget.
+        pair_key: Dotted key path identifying a task and its result.
+        pair_window: Records a task waits for its result before it is shown
+            unmatched, which bounds the pending set on long runs. Must be at
+            least 1 so a result can pair with the task right before it.
+        source_positions: Optional `(line, column)` positions of the first and
+            last character of each record in the input, shown next to its title.
 
     Returns:
         HTML string containing a collapsible list with JSON representation of each dictionary.
+
+    Raises:
+        ValueError: If `pair_window` is less than 1.
     """
+    if pair_window < 1:
+        raise ValueError(f"pair_window must be at least 1, got {pair_window}")
+
     html_parts = [
         "<!DOCTYPE html>",
         "<html>",
@@ -38,159 +180,86 @@ def generate_output_html(data: list[dict]) -> str:
         '        <div class="space-y-4" id="dataContainer">',
     ]
 
-    # Group data into input/output pairs
-    i = 0
+    # Pair tasks with their results using a hash join on the pairing key.
+    # Each task reserves a slot in html_parts that is filled once its result
+    # arrives, or as unmatched when it falls out of the pending window.
+    # A result that matches no pending task falls back to the old behaviour
+    # of pairing with the task directly before it.
     pair_number = 1
+    pending = OrderedDict()  # key -> (record index, slot, pair number, task)
+    adjacent = None  # (key, pending entry) of the previous record if it is a task
+
+    def location(*indices):
+        if source_positions is None:
+            return ""
+        return ", ".join(
+            "{}:{}-{}:{}".format(*source_positions[i][0], *source_positions[i][1])
+            for i in indices
+        )
 
-    while i < len(data):
-        input_item = None
-        output_item = None
-
-        # Look for input/output pair starting from current position
-        if i < len(data) and data[i].get("type") == "task":
-            input_item = data[i]
-            if i + 1 < len(data) and data[i + 1].get("type") == "task_result":
-                output_item = data[i + 1]
-                i += 2  # Skip both items
-            else:
-                i += 1  # Skip only input item
-        elif i < len(data) and data[i].get("type") == "task_result":
-            output_item = data[i]
-            i += 1  # Skip output item
-        else:
-            # Handle items that don't match expected types
-            single_item = data[i]
-
-            # Create title from smart field detection
-            try:
-                name = single_item["payload"]["name"]
-                title = f"{pair_number}. {name}"
-            except (KeyError, TypeError):
-                title = f"Item {pair_number}"
-
-            # Generate smart content for single item
-            smart_content = _generate_smart_content(single_item)
-            full_json = (
-                json.dumps(single_item, indent=4)
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("&", "&amp;")
-            )
-
-            html_parts.append(f"""            <div class="log-item bg-white rounded-lg shadow-md border border-gray-200" data-content="{_escape_for_search(full_json)}">
-                <details>
-                    <summary class="cursor-pointer p-4 font-medium text-gray-700 hover:bg-gray-50 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500">
-                        {title}
-                    </summary>
-                    <div class="px-4 pb-4">
-                        {smart_content}
-                        <details class="mt-4">
-                            <summary class="cursor-pointer text-sm text-gray-500 hover:text-gray-700">
-                                Show Raw JSON
-                            </summary>
-                            <div class="mt-2">
-                                <pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{full_json}</pre>
-                            </div>
-                        </details>
-                    </div>
-                </details>
-            </div>""")
+    def flush(task_index, slot, number, task):
+        html_parts[slot] = _render_pair(
+            number, task, None, blob_store, location(task_index)
+        )
 
+    for index, item in enumerate(data):
+        item_type = item.get("type")
+        key = _pairing_key(item, pair_key) if item_type in PAIR_TYPES else None
+
+        # Evict tasks whose result did not arrive within the window
+        while pending:
+            oldest = next(iter(pending))
+            if pending[oldest][0] >= index - pair_window:
+                break
+            flush(*pending.pop(oldest))
+
+        previous, adjacent = adjacent, None
+        if previous is not None:
+            previous_key, entry = previous
+            # A keyed task may have been evicted or replaced in the meantime
+            waiting = previous_key is None or pending.get(previous_key) is entry
+            if item_type == "task_result" and key not in pending and waiting:
+                if previous_key is not None:
+                    del pending[previous_key]
+                task_index, slot, number, task = entry
+                html_parts[slot] = _render_pair(
+                    number, task, item, blob_store, location(task_index, index)
+                )
+                continue
+            if previous_key is None:
+                flush(*entry)
+
+        if item_type == "task":
+            slot = len(html_parts)
+            html_parts.append("")
+            entry = (index, slot, pair_number, item)
+            if key is not None:
+                if key in pending:
+                    flush(*pending.pop(key))
+                pending[key] = entry
+            adjacent = (key, entry)
             pair_number += 1
-            i += 1
-            continue
-
-        # Create title from input item if available, otherwise from output item
-        try:
-            if input_item:
-                name = input_item["payload"]["name"]
-            elif output_item:
-                name = output_item["payload"]["name"]
-            else:
-                name = None
-
-            title = f"{pair_number}. {name}" if name else f"Item {pair_number}"
-        except (KeyError, TypeError):
-            title = f"Item {pair_number}"
-
-        # Prepare search content
-        search_content_parts = []
-        if input_item:
-            search_content_parts.append(json.dumps(input_item, indent=4))
-        if output_item:
-            search_content_parts.append(json.dumps(output_item, indent=4))
-        search_content = _escape_for_search(" ".join(search_content_parts))
-
-        # Create the main collapsible item
-        html_parts.append(f"""            <div class="log-item bg-white rounded-lg shadow-md border border-gray-200" data-content="{search_content}">
-                <details>
-                    <summary class="cursor-pointer p-4 font-medium text-gray-700 hover:bg-gray-50 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500">
-                        {title}
-                    </summary>
-                    <div class="px-4 pb-4 space-y-3">""")
-
-        # Add input section if available
-        if input_item:
-            smart_input_content = _generate_smart_content(input_item)
-            input_json = (
-                json.dumps(input_item, indent=4)
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("&", "&amp;")
+        elif item_type == "task_result" and key in pending:
+            task_index, slot, number, task = pending.pop(key)
+            html_parts[slot] = _render_pair(
+                number, task, item, blob_store, location(task_index, index)
             )
-
-            html_parts.append(f"""                        <div class="bg-blue-50 rounded border border-blue-200">
-                            <details>
-                                <summary class="cursor-pointer p-3 font-medium text-blue-700 hover:bg-blue-100 rounded focus:outline-none focus:ring-2 focus:ring-blue-400">
-                                    Input
-                                </summary>
-                                <div class="px-3 pb-3">
-                                    {smart_input_content}
-                                    <details class="mt-3">
-                                        <summary class="cursor-pointer text-sm text-blue-600 hover:text-blue-700">
-                                            Show Raw JSON
-                                        </summary>
-                                        <div class="mt-2">
-                                            <pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{input_json}</pre>
-                                        </div>
-                                    </details>
-                                </div>
-                            </details>
-                        </div>""")
-
-        # Add output section if available
-        if output_item:
-            smart_output_content = _generate_smart_content(output_item)
-            output_json = (
-                json.dumps(output_item, indent=4)
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("&", "&amp;")
+        elif item_type == "task_result":
+            html_parts.append(
+                _render_pair(pair_number, None, item, blob_store, location(index))
             )
+            pair_number += 1
+        else:
+            html_parts.append(
+                _render_single_item(pair_number, item, blob_store, location(index))
+            )
+            pair_number += 1
 
-            html_parts.append(f"""                        <div class="bg-green-50 rounded border border-green-200">
-                            <details>
-                                <summary class="cursor-pointer p-3 font-medium text-green-700 hover:bg-green-100 rounded focus:outline-none focus:ring-2 focus:ring-green-400">
-                                    Output
-                                </summary>
-                                <div class="px-3 pb-3">
-                                    {smart_output_content}
-                                    <details class="mt-3">
-                                        <summary class="cursor-pointer text-sm text-green-600 hover:text-green-700">
-                                            Show Raw JSON
-                                        </summary>
-                                        <div class="mt-2">
-                                            <pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{output_json}</pre>
-                                        </div>
-                                    </details>
-                                </div>
-                            </details>
-                        </div>""")
-
-        html_parts.append(
-            "                    </div>\n                </details>\n            </div>"
-        )
-        pair_number += 1
+    # Tasks still waiting at the end of the data are shown without a result
+    if adjacent is not None and adjacent[0] is None:
+        flush(*adjacent[1])
+    for entry in pending.values():
+        flush(*entry)
 
     # Add JavaScript for search functionality
     html_parts.extend(
@@ -245,6 +314,23 @@ def generate_output_html(data: list[dict]) -> str:
             "                searchInput.focus();",
             "            }",
             "        });",
+            "        ",
+            "        // Sidecar blobs for bodies over the inline budget",
+            f"        const blobDir = {json.dumps(blob_store.href_prefix if blob_store else '')};",
+            "        const requestedBlobs = new Set();",
+            "        function pyreprLoadBlob(hash, html) {",
+            '            document.querySelectorAll(`[data-blob-target="${hash}"]`).forEach(el => {',
+            "                el.innerHTML = html;",
+            "            });",
+            "        }",
+            "        document.addEventListener('toggle', (e) => {",
+            "            const hash = e.target.dataset && e.target.dataset.blob;",
+            "            if (!e.target.open || !hash || requestedBlobs.has(hash)) return;",
+            "            requestedBlobs.add(hash);",
+            "            const script = document.createElement('script');",
+            "            script.src = `${blobDir}/${hash}.js`;",
+            "            document.head.appendChild(script);",
+            "        }, true);",
             "    </script>",
             "</body>",
             "</html>",
@@ -254,66 +340,285 @@ def generate_output_html(data: list[dict]) -> str:
     return "\n".join(html_parts)
 
 
-def _generate_smart_content(item: dict) -> str:
-    """Generate smart content display based on field types and importance."""
-    smart_parts = []
+def extract_nested_value(obj, key_path: str):
+    """Extract value from nested dict using dot notation or direct key."""
+    try:
+        if "." in key_path:
+            keys = key_path.split(".")
+            value = obj
+            for k in keys:
+                value = value[k]
+            return value
+        else:
+            return obj.get(key_path)
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+
+def _pairing_key(item: dict, pair_key: str):
+    """Extract the pairing key of a task or task result, or None if it is unusable."""
+    key = extract_nested_value(item, pair_key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _render_single_item(
+    pair_number: int, single_item: dict, blob_store, location: str = ""
+) -> str:
+    """Render a record that is neither a task nor a task result."""
+    # Create title from smart field detection
+    try:
+        name = single_item["payload"]["name"]
+        title = f"{pair_number}. {name}"
+    except (KeyError, TypeError):
+        title = f"Item {pair_number}"
+    title += _location_label(location)
+
+    # Generate smart content for single item
+    smart_content = _generate_smart_content(single_item, blob_store)
+    full_json = json.dumps(single_item, indent=4, default=json_default)
+    raw_attrs, raw_body = _details_body(
+        f'<pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{_escape_html(full_json)}</pre>',
+        blob_store,
+        "mt-2",
+    )
 
-    # Extract key information for summary
-    summary_fields = []
-
-    # Look for common important fields
-    important_keys = [
-        "id",
-        "name",
-        "title",
-        "type",
-        "status",
-        "message",
-        "error",
-        "user_query",
-        "query",
-        "response",
-        "result",
-        "timestamp",
-        "time",
+    return f"""            <div class="log-item bg-white rounded-lg shadow-md border border-gray-200" data-content="{_search_content(full_json, blob_store)}">
+                <details>
+                    <summary class="cursor-pointer p-4 font-medium text-gray-700 hover:bg-gray-50 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500">
+                        {title}
+                    </summary>
+                    <div class="px-4 pb-4">
+                        {smart_content}
+                        <details class="mt-4"{raw_attrs}>
+                            <summary class="cursor-pointer text-sm text-gray-500 hover:text-gray-700">
+                                Show Raw JSON
+                            </summary>
+                            {raw_body}
+                        </details>
+                    </div>
+                </details>
+            </div>"""
+
+
+def _render_pair(
+    pair_number: int,
+    input_item: dict | None,
+    output_item: dict | None,
+    blob_store,
+    location: str = "",
+) -> str:
+    """Render a task and its result, either of which may be missing."""
+    pair_parts = []
+
+    # Create title from input item if available, otherwise from output item
+    try:
+        if input_item:
+            name = input_item["payload"]["name"]
+        elif output_item:
+            name = output_item["payload"]["name"]
+        else:
+            name = None
+
+        title = f"{pair_number}. {name}" if name else f"Item {pair_number}"
+    except (KeyError, TypeError):
+        title = f"Item {pair_number}"
+    title += _location_label(location)
+
+    # Prepare search content
+    search_content_parts = []
+    if input_item:
+        search_content_parts.append(
+            json.dumps(input_item, indent=4, default=json_default)
+        )
+    if output_item:
+        search_content_parts.append(
+            json.dumps(output_item, indent=4, default=json_default)
+        )
+    search_content = _search_content(" ".join(search_content_parts), blob_store)
+
+    # Create the main collapsible item
+    pair_parts.append(f"""            <div class="log-item bg-white rounded-lg shadow-md border border-gray-200" data-content="{search_content}">
+                <details>
+                    <summary class="cursor-pointer p-4 font-medium text-gray-700 hover:bg-gray-50 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500">
+                        {title}
+                    </summary>
+                    <div class="px-4 pb-4 space-y-3">""")
+
+    # Add input section if available
+    if input_item:
+        smart_input_content = _generate_smart_content(input_item, blob_store)
+        input_attrs, input_body = _details_body(
+            f'<pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{_escape_html(json.dumps(input_item, indent=4, default=json_default))}</pre>',
+            blob_store,
+            "mt-2",
+        )
+
+        pair_parts.append(f"""                        <div class="bg-blue-50 rounded border border-blue-200">
+                            <details>
+                                <summary class="cursor-pointer p-3 font-medium text-blue-700 hover:bg-blue-100 rounded focus:outline-none focus:ring-2 focus:ring-blue-400">
+                                    Input
+                                </summary>
+                                <div class="px-3 pb-3">
+                                    {smart_input_content}
+                                    <details class="mt-3"{input_attrs}>
+                                        <summary class="cursor-pointer text-sm text-blue-600 hover:text-blue-700">
+                                            Show Raw JSON
+                                        </summary>
+                                        {input_body}
+                                    </details>
+                                </div>
+                            </details>
+                        </div>""")
+
+    # Add output section if available
+    if output_item:
+        smart_output_content = _generate_smart_content(output_item, blob_store)
+        output_attrs, output_body = _details_body(
+            f'<pre class="bg-gray-100 p-3 rounded text-sm overflow-auto text-gray-800 font-mono">{_escape_html(json.dumps(output_item, indent=4, default=json_default))}</pre>',
+            blob_store,
+            "mt-2",
+        )
+
+        pair_parts.append(f"""                        <div class="bg-green-50 rounded border border-green-200">
+                            <details>
+                                <summary class="cursor-pointer p-3 font-medium text-green-700 hover:bg-green-100 rounded focus:outline-none focus:ring-2 focus:ring-green-400">
+                                    Output
+                                </summary>
+                                <div class="px-3 pb-3">
+                                    {smart_output_content}
+                                    <details class="mt-3"{output_attrs}>
+                                        <summary class="cursor-pointer text-sm text-green-600 hover:text-green-700">
+                                            Show Raw JSON
+                                        </summary>
+                                        {output_body}
+                                    </details>
+                                </div>
+                            </details>
+                        </div>""")
+
+    pair_parts.append(
+        "                    </div>\n                </details>\n            </div>"
+    )
+    return "\n".join(pair_parts)
+
+
+def _location_label(location: str) -> str:
+    """Small input position range shown after a record title, if known."""
+    if not location:
+        return ""
+    return f' <span class="ml-2 text-xs font-mono text-gray-400">{location}</span>'
+
+
+def value_category(value) -> tuple[str, str]:
+    """Classify a value into its display category and size/shape hint.
+
+    Returns:
+        Tuple of the category name (e.g. ``"Text Fields"``) and a hint such as
+        ``"long"`` or ``"small"``.
+    """
+    category = _type_category(type(value))
+    if category == "Text Fields":
+        return category, "long" if len(value) > 100 else "short"
+    elif category == "Objects":
+        # Small objects are shown inline, large ones as collapsible
+        return category, "small" if len(value) <= 3 else "large"
+    return category, CATEGORY_HINTS[category]
+
+
+def _layout_shape(item: dict) -> tuple:
+    """Describe the parts of a record that decide its smart content layout.
+
+    That is the root keys, and the ``payload`` and ``input`` keys when those
+    are dictionaries, each with the type of its value. Display categories only
+    depend on the type, so this is enough to plan the layout.
+    """
+    payload = item.get("payload")
+    nested_input = item.get("input")
+    return (
+        tuple(zip(item, map(type, item.values()))),
+        tuple(zip(payload, map(type, payload.values())))
+        if isinstance(payload, dict)
+        else None,
+        tuple(zip(nested_input, map(type, nested_input.values())))
+        if isinstance(nested_input, dict)
+        else None,
+    )
+
+
+def _type_category(value_type: type) -> str:
+    """Return the display category of values of the given type.
+
+    This is the single source of the category rules, shared by the layout
+    planner and `value_category`.
+    """
+    if issubclass(value_type, str):
+        return "Text Fields"
+    elif issubclass(value_type, (int, float, bool)):
+        return "Numbers & Booleans"
+    elif issubclass(value_type, (list, array)):
+        return "Arrays"
+    elif issubclass(value_type, dict):
+        return "Objects"
+    else:
+        return "Other"
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _plan_layout(shape: tuple) -> tuple[tuple, tuple]:
+    """Compute the summary fields and field categories for a record shape.
+
+    Returns:
+        Tuple of the summary fields as ``(key, location)`` pairs, where the
+        location is ``"root"``, ``"payload"`` or ``"input"``, and the
+        categories as ``(category, keys)`` pairs in display order.
+    """
+    root, payload, nested_input = shape
+    locations = [
+        ("root", dict(root)),
+        ("payload", dict(payload or ())),
+        ("input", dict(nested_input or ())),
     ]
 
-    def extract_nested_value(obj, key_path):
-        """Extract value from nested dict using dot notation or direct key."""
-        try:
-            if "." in key_path:
-                keys = key_path.split(".")
-                value = obj
-                for k in keys:
-                    value = value[k]
-                return value
-            else:
-                return obj.get(key_path)
-        except (KeyError, TypeError):
-            return None
-
-    # Check for important fields in the root and common nested locations
-    for key in important_keys:
-        value = None
-
-        # Try direct access
-        if key in item:
-            value = item[key]
-        # Try payload access
-        elif (
-            "payload" in item
-            and isinstance(item["payload"], dict)
-            and key in item["payload"]
-        ):
-            value = item["payload"][key]
-        # Try input access (for outputs that reference inputs)
-        elif (
-            "input" in item and isinstance(item["input"], dict) and key in item["input"]
-        ):
-            value = item["input"][key]
-
-        if value is not None:
-            summary_fields.append((key, value))
+    # Check for important fields in the root and common nested locations.
+    # The first location holding the key wins, even when its value is None.
+    summary = []
+    for key in IMPORTANT_KEYS:
+        for location, types in locations:
+            if key in types:
+                if types[key] is not type(None):
+                    summary.append((key, location))
+                break
+
+    # Process other fields by category, skipping those shown in the summary
+    shown = {key for key, _ in summary}
+    categories = {category: [] for category in CATEGORY_ORDER}
+    for key, value_type in root:
+        if isinstance(key, str) and key.lower() in shown:
+            continue
+        categories[_type_category(value_type)].append(key)
+
+    return tuple(summary), tuple(
+        (category, tuple(keys)) for category, keys in categories.items() if keys
+    )
+
+
+def _generate_smart_content(item: dict, blob_store: BlobStore | None = None) -> str:
+    """Generate smart content display based on field types and importance.
+
+    The layout is planned once per record shape and cached, so records that
+    share their keys render with direct lookups.
+    """
+    smart_parts = []
+
+    summary_plan, category_plan = _plan_layout(_layout_shape(item))
+    sources = {"root": item, "payload": item.get("payload"), "input": item.get("input")}
+
+    # Extract key information for summary
+    summary_fields = [(key, sources[location][key]) for key, location in summary_plan]
 
     # Generate summary section if we found important fields
     if summary_fields:
@@ -325,70 +630,29 @@ def _generate_smart_content(item: dict) -> str:
         )
 
         for key, value in summary_fields[:6]:  # Limit to first 6 important fields
-            formatted_value = _format_smart_value(value, key)
+            formatted_value = _format_smart_value(value, key, blob_store)
             smart_parts.append(
                 f'<div class="mb-1"><span class="font-medium text-blue-700">{key.replace("_", " ").title()}:</span> {formatted_value}</div>'
             )
 
         smart_parts.append("</div>")
 
-    # Process other fields by category
-    categories = {
-        "Text Fields": [],
-        "Numbers & Booleans": [],
-        "Arrays": [],
-        "Objects": [],
-        "Other": [],
-    }
-
-    def categorize_fields(obj, prefix=""):
-        for key, value in obj.items():
-            full_key = f"{prefix}.{key}" if prefix else key
-
-            # Skip if already shown in summary
-            if any(
-                key.lower() == important_key.lower()
-                for important_key, _ in summary_fields
-            ):
-                continue
-
-            if isinstance(value, str):
-                if len(value) > 100:
-                    categories["Text Fields"].append((full_key, value, "long"))
-                else:
-                    categories["Text Fields"].append((full_key, value, "short"))
-            elif isinstance(value, (int, float, bool)):
-                categories["Numbers & Booleans"].append((full_key, value, "simple"))
-            elif isinstance(value, list):
-                categories["Arrays"].append((full_key, value, "array"))
-            elif isinstance(value, dict):
-                if len(value) <= 3:  # Small objects, show inline
-                    categories["Objects"].append((full_key, value, "small"))
-                else:  # Large objects, show as collapsible
-                    categories["Objects"].append((full_key, value, "large"))
-            else:
-                categories["Other"].append((full_key, value, "other"))
-
-    # Categorize root level fields
-    categorize_fields(item)
-
     # Generate categorized content
-    for category, fields in categories.items():
-        if fields:
-            smart_parts.append('<details class="mb-3">')
+    for category, keys in category_plan:
+        smart_parts.append('<details class="mb-3">')
+        smart_parts.append(
+            f'<summary class="cursor-pointer font-medium text-gray-700 hover:text-gray-900">{category} ({len(keys)})</summary>'
+        )
+        smart_parts.append('<div class="mt-2 space-y-2">')
+
+        for key in keys:
+            formatted_value = _format_smart_value(item[key], key, blob_store)
             smart_parts.append(
-                f'<summary class="cursor-pointer font-medium text-gray-700 hover:text-gray-900">{category} ({len(fields)})</summary>'
+                f'<div class="flex flex-wrap items-start"><span class="font-medium text-gray-600 mr-2 min-w-0">{key}:</span><span class="flex-1 min-w-0">{formatted_value}</span></div>'
             )
-            smart_parts.append('<div class="mt-2 space-y-2">')
-
-            for key, value, value_type in fields:
-                formatted_value = _format_smart_value(value, key)
-                smart_parts.append(
-                    f'<div class="flex flex-wrap items-start"><span class="font-medium text-gray-600 mr-2 min-w-0">{key}:</span><span class="flex-1 min-w-0">{formatted_value}</span></div>'
-                )
 
-            smart_parts.append("</div>")
-            smart_parts.append("</details>")
+        smart_parts.append("</div>")
+        smart_parts.append("</details>")
 
     return (
         "\n".join(smart_parts)
@@ -397,64 +661,63 @@ def _generate_smart_content(item: dict) -> str:
     )
 
 
-def _format_smart_value(value, key=""):
+def _format_smart_value(value, key="", blob_store: BlobStore | None = None):
     """Format values intelligently based on type and content."""
     if isinstance(value, str):
         if len(value) > 200:
             # Long text - show truncated with expand
-            escaped = (
-                value.replace("<", "&lt;").replace(">", "&gt;").replace("&", "&amp;")
+            truncated = _escape_html(value[:200]) + "..."
+            attrs, body = _details_body(
+                _escape_html(value),
+                blob_store,
+                "mt-1 p-2 bg-gray-50 rounded text-sm whitespace-pre-wrap",
             )
-            truncated = escaped[:200] + "..."
             return f"""<div>
                 <div class="text-gray-800">{truncated}</div>
-                <details class="mt-1">
+                <details class="mt-1"{attrs}>
                     <summary class="cursor-pointer text-sm text-blue-600 hover:text-blue-700">Show full text</summary>
-                    <div class="mt-1 p-2 bg-gray-50 rounded text-sm whitespace-pre-wrap">{escaped}</div>
+                    {body}
                 </details>
             </div>"""
         else:
             # Short text
-            escaped = (
-                value.replace("<", "&lt;").replace(">", "&gt;").replace("&", "&amp;")
-            )
-            return f'<span class="text-gray-800">{escaped}</span>'
+            return f'<span class="text-gray-800">{_escape_html(value)}</span>'
+
+    elif isinstance(value, array):
+        # Compact numeric list - show statistics and a sampled preview only
+        if len(value) == 0:
+            return '<span class="text-gray-500 italic">Empty array</span>'
+        summary = numeric_summary(value)
+        preview = ", ".join(str(item) for item in sample_preview(value))
+        return f"""<div>
+                <span class="text-gray-600">Numeric array ({summary["count"]} items): [{preview}, ...]</span>
+                <div class="text-sm text-purple-600">min {summary["min"]} &middot; max {summary["max"]} &middot; mean {summary["mean"]:.6g}</div>
+            </div>"""
 
     elif isinstance(value, list):
         if len(value) == 0:
             return '<span class="text-gray-500 italic">Empty array</span>'
-        elif len(value) <= 3:
-            # Small array - show all items
-            items = []
-            for item in value:
-                if isinstance(item, str):
-                    items.append(f'"{item}"')
-                else:
-                    items.append(str(item))
-            return f'<span class="text-gray-800">[{", ".join(items)}]</span>'
-        else:
-            # Large array - show count and first few items
-            preview_items = []
-            for item in value[:3]:
-                if isinstance(item, str):
-                    preview_items.append(f'"{item}"')
-                else:
-                    preview_items.append(str(item))
-            preview = ", ".join(preview_items)
-            full_json = (
-                json.dumps(value, indent=2)
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("&", "&amp;")
-            )
+        if len(value) <= 3:
+            # Small array - show all items, unless they exceed the inline budget
+            items = ", ".join(_preview_item(item) for item in value)
+            if blob_store is None or blob_store.fits_inline(items):
+                return f'<span class="text-gray-800">[{items}]</span>'
+
+        # Large array - show count and first few items
+        preview = ", ".join(
+            _preview_item(item, PREVIEW_ITEM_LENGTH) for item in value[:3]
+        )
+        attrs, body = _details_body(
+            f'<pre class="bg-gray-50 p-2 rounded text-sm overflow-auto">{_escape_html(json.dumps(value, indent=2, default=json_default))}</pre>',
+            blob_store,
+            "mt-1",
+        )
 
-            return f"""<div>
+        return f"""<div>
                 <span class="text-gray-600">Array ({len(value)} items): [{preview}, ...]</span>
-                <details class="mt-1">
+                <details class="mt-1"{attrs}>
                     <summary class="cursor-pointer text-sm text-blue-600 hover:text-blue-700">Show all items</summary>
-                    <div class="mt-1">
-                        <pre class="bg-gray-50 p-2 rounded text-sm overflow-auto">{full_json}</pre>
-                    </div>
+                    {body}
                 </details>
             </div>"""
 
@@ -472,19 +735,16 @@ def _format_smart_value(value, key=""):
             return f'<span class="text-gray-800">{{{", ".join(pairs)}}}</span>'
         else:
             # Large object - show as collapsible
-            full_json = (
-                json.dumps(value, indent=2)
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("&", "&amp;")
+            attrs, body = _details_body(
+                f'<pre class="bg-gray-50 p-2 rounded text-sm overflow-auto">{_escape_html(json.dumps(value, indent=2, default=json_default))}</pre>',
+                blob_store,
+                "mt-1",
             )
             return f"""<div>
                 <span class="text-gray-600">Object ({len(value)} fields)</span>
-                <details class="mt-1">
+                <details class="mt-1"{attrs}>
                     <summary class="cursor-pointer text-sm text-blue-600 hover:text-blue-700">Expand object</summary>
-                    <div class="mt-1">
-                        <pre class="bg-gray-50 p-2 rounded text-sm overflow-auto">{full_json}</pre>
-                    </div>
+                    {body}
                 </details>
             </div>"""
 
@@ -500,6 +760,62 @@ def _format_smart_value(value, key=""):
         return f'<span class="text-gray-600">{str(value)}</span>'
 
 
+def _preview_item(item, max_length: int | None = None) -> str:
+    """Render one array item for an inline preview, cut to `max_length` characters."""
+    text = f'"{item}"' if isinstance(item, str) else str(item)
+    if max_length is not None and len(text) > max_length:
+        text = text[:max_length] + "..."
+    return _escape_html(text)
+
+
 def _escape_for_search(text: str) -> str:
     """Escape text for use in HTML data attributes."""
     return text.replace('"', "&quot;").replace("'", "&#39;")
+
+
+def _escape_html(text: str) -> str:
+    """Escape text for use as HTML element content."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _search_content(text: str, blob_store: BlobStore | None) -> str:
+    """Build the search attribute, capped to the inline budget when one is set.
+
+    The cap applies to the escaped UTF-8 bytes, as for blobs, without cutting
+    through a character or an entity.
+    """
+    if blob_store is None:
+        return _escape_for_search(text)
+
+    # Escaping never shortens text, so characters past the budget cannot fit
+    limit = blob_store.max_inline_bytes
+    escaped = _escape_for_search(text[:limit])
+    if blob_store.fits_inline(escaped):
+        return escaped
+
+    escaped = escaped.encode("utf-8")[:limit].decode("utf-8", "ignore")
+    entity = escaped.rfind("&", -5)
+    if entity != -1 and ";" not in escaped[entity:]:
+        escaped = escaped[:entity]
+    return escaped
+
+
+def _details_body(
+    body: str, blob_store: BlobStore | None, div_class: str
+) -> tuple[str, str]:
+    """Build the attributes and content of an expandable `<details>` body.
+
+    Bodies over the inline budget are written to the blob store and replaced
+    with a placeholder that the viewer fills in when the section is opened.
+
+    Returns:
+        Tuple of extra `<details>` attributes and the body markup.
+    """
+    if blob_store is None or blob_store.fits_inline(body):
+        return "", f'<div class="{div_class}">{body}</div>'
+
+    digest = blob_store.store(body)
+    return (
+        f' data-blob="{digest}"',
+        f'<div class="{div_class}" data-blob-target="{digest}"><span class="text-gray-500 italic">Loading...</span></div>',
+    )
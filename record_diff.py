@@ -0,0 +1,236 @@
+import hashlib
+import json
+from array import array
+from collections import defaultdict, deque
+from itertools import zip_longest
+from typing import Generator, Iterable
+
+import tokenizer
+from numeric_array import json_default
+from output_generator import extract_nested_value
+
+
+# Marks a record that only exists on one side, since a record may itself be None
+MISSING = object()
+
+
+class HashNode:
+    """Merkle hash of a parsed value, with the hashes of its children.
+
+    Dictionaries keep their children by key and lists by position. Scalars
+    and numeric arrays are leaves.
+    """
+
+    __slots__ = ("digest", "value", "children")
+
+    def __init__(self, digest: bytes, value, children: dict | list | None = None):
+        self.digest = digest
+        self.value = value
+        self.children = children
+
+
+def _digest(*parts: bytes) -> bytes:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part)
+    return hasher.digest()
+
+
+def hash_tree(value) -> HashNode:
+    """Hash a value bottom-up so equal subtrees get equal digests.
+
+    Dictionary hashes do not depend on key order.
+    """
+    if isinstance(value, dict):
+        children = {key: hash_tree(item) for key, item in value.items()}
+        parts = sorted(
+            _digest(repr(key).encode("utf-8")) + child.digest
+            for key, child in children.items()
+        )
+        return HashNode(_digest(b"dict", *parts), value, children)
+
+    if isinstance(value, (list, tuple)):
+        children = [hash_tree(item) for item in value]
+        tag = b"list" if isinstance(value, list) else b"tuple"
+        return HashNode(
+            _digest(tag, *(child.digest for child in children)), value, children
+        )
+
+    if isinstance(value, array):
+        return HashNode(
+            _digest(b"array", value.typecode.encode(), value.tobytes()), value
+        )
+
+    return HashNode(
+        _digest(type(value).__name__.encode(), repr(value).encode("utf-8")), value
+    )
+
+
+def diff_trees(
+    old: HashNode, new: HashNode, path: str = ""
+) -> Generator[dict, None, None]:
+    """Yield changes between two hash trees, skipping identical subtrees."""
+    if old.digest == new.digest:
+        return
+
+    if isinstance(old.children, dict) and isinstance(new.children, dict):
+        for key, old_child in old.children.items():
+            child_path = f"{path}.{key}"
+            if key in new.children:
+                yield from diff_trees(old_child, new.children[key], child_path)
+            else:
+                yield {"op": "removed", "path": child_path, "old": old_child.value}
+        for key, new_child in new.children.items():
+            if key not in old.children:
+                yield {"op": "added", "path": f"{path}.{key}", "new": new_child.value}
+        return
+
+    if isinstance(old.children, list) and isinstance(new.children, list):
+        for index, (old_child, new_child) in enumerate(
+            zip_longest(old.children, new.children)
+        ):
+            child_path = f"{path}[{index}]"
+            if new_child is None:
+                yield {"op": "removed", "path": child_path, "old": old_child.value}
+            elif old_child is None:
+                yield {"op": "added", "path": child_path, "new": new_child.value}
+            else:
+                yield from diff_trees(old_child, new_child, child_path)
+        return
+
+    if (
+        isinstance(old.value, array)
+        and isinstance(new.value, array)
+        and len(old.value) == len(new.value)
+    ):
+        # Same-length numeric arrays report only the positions that differ
+        for index, (old_item, new_item) in enumerate(zip(old.value, new.value)):
+            if old_item != new_item:
+                yield {
+                    "op": "changed",
+                    "path": f"{path}[{index}]",
+                    "old": old_item,
+                    "new": new_item,
+                }
+        return
+
+    yield {"op": "changed", "path": path, "old": old.value, "new": new.value}
+
+
+def diff_records(old, new, path: str) -> Generator[dict, None, None]:
+    """Yield the changes between two records, `MISSING` meaning absent."""
+    if old is MISSING:
+        yield {"op": "added", "path": path, "new": new}
+    elif new is MISSING:
+        yield {"op": "removed", "path": path, "old": old}
+    elif old == new and repr(old) == repr(new):
+        # Identical records are common, so skip hashing them. Comparing the
+        # reprs keeps the distinctions the hashes make, such as 1, 1.0 and True
+        return
+    else:
+        yield from diff_trees(hash_tree(old), hash_tree(new), path)
+
+
+def diff_by_index(
+    old_records: Iterable, new_records: Iterable
+) -> Generator[dict, None, None]:
+    """Align records by position. Both sides are streamed."""
+    for index, (old, new) in enumerate(
+        zip_longest(old_records, new_records, fillvalue=MISSING)
+    ):
+        yield from diff_records(old, new, f"[{index}]")
+
+
+def diff_by_key(
+    old_records: Iterable, new_records: Iterable, key_path: str
+) -> Generator[dict, None, None]:
+    """Align records by the value at `key_path`.
+
+    Old records are indexed by key and the new side is streamed against
+    them. Records without a usable key are aligned by position among the
+    keyless records, and duplicate keys are matched in order.
+    """
+
+    def record_key(record, index):
+        key = extract_nested_value(record, key_path)
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        return ("key", key) if key is not None else ("index", index)
+
+    def record_path(key):
+        kind, value = key
+        return f"[{key_path}={value}]" if kind == "key" else f"[#{value}]"
+
+    pending = defaultdict(deque)
+    keyless = 0
+    for record in old_records:
+        key = record_key(record, keyless)
+        keyless += key[0] == "index"
+        pending[key].append(record)
+
+    keyless = 0
+    for record in new_records:
+        key = record_key(record, keyless)
+        keyless += key[0] == "index"
+        old = pending[key].popleft() if pending.get(key) else MISSING
+        yield from diff_records(old, record, record_path(key))
+
+    for key, records in pending.items():
+        for old in records:
+            yield from diff_records(old, MISSING, record_path(key))
+
+
+def _file_digest(path: str) -> bytes:
+    hasher = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def diff_files(
+    old_path: str,
+    new_path: str,
+    output_path: str,
+    key_path: str | None = None,
+    paths_only: bool = False,
+) -> int:
+    """Write the structural differences between two dumps as JSON lines.
+
+    Byte-identical files are detected up front and not parsed at all.
+
+    Args:
+        old_path: Baseline dump.
+        new_path: Dump to compare against the baseline.
+        output_path: File receiving one JSON change per line.
+        key_path: Dotted key path used to align records. Records are aligned
+            by position when it is not set.
+        paths_only: Omit the old and new values from the output.
+
+    Returns:
+        Number of changes written.
+    """
+    count = 0
+    with open(output_path, "w") as f:
+        if _file_digest(old_path) == _file_digest(new_path):
+            return count
+
+        with open(old_path, "r") as old_file:
+            old_records = tokenizer.iter_records_with_tokenizer(old_file.read())
+        with open(new_path, "r") as new_file:
+            new_records = tokenizer.iter_records_with_tokenizer(new_file.read())
+
+        if key_path is None:
+            changes = diff_by_index(old_records, new_records)
+        else:
+            changes = diff_by_key(old_records, new_records, key_path)
+
+        for change in changes:
+            if paths_only:
+                change = {"op": change["op"], "path": change["path"]}
+            f.write(json.dumps(change, default=json_default) + "\n")
+            count += 1
+
+    return count
@@ -0,0 +1,155 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+from concurrent.futures import ProcessPoolExecutor
+
+import tokenizer
+from numeric_array import json_default
+from output_generator import (
+    DEFAULT_PAIR_KEY,
+    DEFAULT_PAIR_WINDOW,
+    generate_output_html,
+)
+
+# Upper bound for the JSON header line of a request
+MAX_HEADER_BYTES = 65536
+
+COMMANDS = ("json", "html")
+
+
+def render(
+    command: str,
+    data: str,
+    pair_key: str = DEFAULT_PAIR_KEY,
+    pair_window: int = DEFAULT_PAIR_WINDOW,
+) -> str:
+    """Parse raw repr text and render it as JSON or HTML.
+
+    Runs inside a warm worker process of the server pool.
+    """
+    result = tokenizer.parse_dict_with_tokenizer(data)
+    if command == "html":
+        return generate_output_html(result, pair_key=pair_key, pair_window=pair_window)
+    return json.dumps(result, indent=2, default=json_default)
+
+
+def _warm_up():
+    # Runs a tiny parse so each worker has its imports loaded before traffic arrives
+    tokenizer.parse_dict_with_tokenizer("[{'warm': 1}]")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Handle one request per connection.
+
+    A request is a JSON header line such as ``{"command": "json", "length": 42}``
+    followed by `length` bytes of UTF-8 input. The response is a JSON header
+    line with ``status`` and either ``length`` plus the body, or ``error``.
+    """
+
+    def handle(self):
+        try:
+            header = json.loads(self.rfile.readline(MAX_HEADER_BYTES))
+            command = header.get("command")
+            if command not in COMMANDS:
+                raise ValueError(f"Unknown command: {command}")
+
+            length = header.get("length")
+            # read() with a negative length would block until the client hangs up
+            if type(length) is not int or length < 0:
+                raise ValueError(f"Invalid length: {length!r}")
+
+            data = self.rfile.read(length).decode("utf-8")
+            future = self.server.executor.submit(
+                render,
+                command,
+                data,
+                header.get("pair_key", DEFAULT_PAIR_KEY),
+                header.get("pair_window", DEFAULT_PAIR_WINDOW),
+            )
+            body = future.result().encode("utf-8")
+        except Exception as e:
+            self._write_header({"status": "error", "error": f"{type(e).__name__}: {e}"})
+            return
+
+        self._write_header({"status": "ok", "length": len(body)})
+        self.wfile.write(body)
+
+    def _write_header(self, header: dict):
+        self.wfile.write(json.dumps(header).encode("utf-8") + b"\n")
+
+
+class ParseServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server that hands parse/render work to a process pool."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        super().__init__(socket_path, RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove a socket left behind by a server that is no longer running.
+
+    Raises:
+        FileExistsError: If the path is not a socket, or a server is still
+            listening on it.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            pass
+        else:
+            raise FileExistsError(f"A server is already listening on {socket_path}")
+    os.remove(socket_path)
+
+
+def serve(socket_path: str, workers: int | None = None):
+    """Serve parse/render requests on a Unix domain socket until interrupted.
+
+    Args:
+        socket_path: Filesystem path of the socket. A stale socket is replaced.
+        workers: Number of worker processes. Defaults to the CPU count.
+
+    Raises:
+        FileExistsError: If `socket_path` is not a socket or is in use.
+    """
+    _remove_stale_socket(socket_path)
+
+    server = ParseServer(socket_path, workers)
+    try:
+        # Start every worker up front so the first requests do not pay for it
+        warm_ups = [server.executor.submit(_warm_up) for _ in range(server.workers)]
+        for future in warm_ups:
+            future.result()
+        # Installed after the workers are forked so only the server handles it
+        signal.signal(signal.SIGTERM, _stop)
+
+        print(f"Listening on {socket_path}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
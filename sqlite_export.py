@@ -0,0 +1,91 @@
+import json
+import sqlite3
+from itertools import islice
+from typing import Iterable
+
+from numeric_array import json_default
+from output_generator import extract_nested_value
+
+# Hot columns and the key paths they are read from, first match wins
+HOT_COLUMNS = {
+    "type": ["type", "payload.type"],
+    "name": ["payload.name", "name"],
+    "status": ["payload.status", "status", "result.status"],
+}
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def extract_hot_columns(record) -> tuple:
+    """Read the hot column values of a record.
+
+    Scalars are stored as-is, nested values as JSON, missing values as NULL.
+    """
+    values = []
+    for key_paths in HOT_COLUMNS.values():
+        value = None
+        for key_path in key_paths:
+            value = extract_nested_value(record, key_path)
+            if value is not None:
+                break
+        if value is not None and not isinstance(value, (str, int, float)):
+            value = json.dumps(value, default=json_default)
+        values.append(value)
+    return tuple(values)
+
+
+def export_sqlite(
+    records: Iterable, db_path: str, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Stream parsed records into an indexed SQLite table.
+
+    The ``records`` table is recreated on every export. Each row stores the
+    record position, the hot columns and the full record as a JSON ``data``
+    column. Rows are inserted with batched ``executemany`` calls in a single
+    transaction, and the indexes are built once the load has finished.
+
+    Args:
+        records: Parsed top-level records, typically from
+            `tokenizer.iter_records_with_tokenizer`.
+        db_path: Path of the SQLite database file.
+        batch_size: Number of rows per ``executemany`` call.
+
+    Returns:
+        Number of records written.
+    """
+    columns = ", ".join(f"{column} TEXT" for column in HOT_COLUMNS)
+    placeholders = ", ".join("?" for _ in range(len(HOT_COLUMNS) + 2))
+
+    rows = (
+        (index, *extract_hot_columns(record), json.dumps(record, default=json_default))
+        for index, record in enumerate(records)
+    )
+
+    connection = sqlite3.connect(db_path)
+    try:
+        # The table is rebuilt from the source on failure, so durability
+        # during the load is not needed
+        connection.execute("PRAGMA journal_mode = MEMORY")
+        connection.execute("PRAGMA synchronous = OFF")
+
+        count = 0
+        with connection:
+            connection.execute("DROP TABLE IF EXISTS records")
+            connection.execute(
+                f"CREATE TABLE records (id INTEGER PRIMARY KEY, {columns}, data TEXT NOT NULL)"
+            )
+            while batch := list(islice(rows, batch_size)):
+                connection.executemany(
+                    f"INSERT INTO records VALUES ({placeholders})", batch
+                )
+                count += len(batch)
+
+            for column in HOT_COLUMNS:
+                connection.execute(
+                    f"CREATE INDEX idx_records_{column} ON records ({column})"
+                )
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    return count
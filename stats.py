@@ -0,0 +1,269 @@
+import hashlib
+import math
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+import tokenizer
+from numeric_array import numeric_summary
+from output_generator import value_category
+
+# Registers of the distinct-count sketch are 2^precision bytes per key path
+HLL_PRECISION = 12
+
+
+class HyperLogLog:
+    """Fixed-memory approximate distinct counter.
+
+    With the default precision the standard error is about 1.6% and each
+    sketch uses 4 KiB. Sketches with the same precision merge losslessly.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0**-register for register in self.registers)
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * size and zeros:
+            return round(size * math.log(size / zeros))
+        return round(raw)
+
+
+class KeyStats:
+    """Mergeable accumulator for the values seen at one key path."""
+
+    def __init__(self):
+        self.count = 0
+        self.types = Counter()
+        self.categories = Counter()
+        self.nulls = 0
+        self.empties = 0
+        self.string_lengths = Counter()  # power-of-two bucket -> count
+        self.string_min = None
+        self.string_max = None
+        self.string_total = 0
+        self.string_count = 0
+        self.numeric_min = None
+        self.numeric_max = None
+        self.numeric_total = 0.0
+        self.numeric_count = 0
+        self.distinct = HyperLogLog()
+
+    def add(self, value):
+        self.count += 1
+        # Numeric arrays are parsed lists, so they count as lists here
+        self.types["list" if isinstance(value, array) else type(value).__name__] += 1
+        self.categories[value_category(value)[0]] += 1
+
+        if value is None:
+            self.nulls += 1
+            return
+
+        if isinstance(value, (str, list, dict, tuple, array)) and len(value) == 0:
+            self.empties += 1
+
+        if isinstance(value, str):
+            length = len(value)
+            self.string_lengths[length.bit_length()] += 1
+            self.string_min = _min(self.string_min, length)
+            self.string_max = _max(self.string_max, length)
+            self.string_total += length
+            self.string_count += 1
+            self.distinct.add(f"str:{value}")
+        elif isinstance(value, bool):
+            self.distinct.add(f"bool:{value}")
+        elif isinstance(value, (int, float)):
+            self.numeric_min = _min(self.numeric_min, value)
+            self.numeric_max = _max(self.numeric_max, value)
+            self.numeric_total += value
+            self.numeric_count += 1
+            self.distinct.add(f"num:{value!r}")
+
+    def add_array(self, values: array):
+        """Add every item of a numeric array, like calling `add` on each one."""
+        if not values:
+            return
+
+        summary = numeric_summary(values)
+        count = summary["count"]
+        self.count += count
+        self.types["int" if values.typecode == "q" else "float"] += count
+        self.categories[value_category(values[0])[0]] += count
+        self.numeric_min = _min(self.numeric_min, summary["min"])
+        self.numeric_max = _max(self.numeric_max, summary["max"])
+        self.numeric_total += summary["mean"] * count
+        self.numeric_count += count
+        # The sketch ignores repeats, so each distinct value is hashed once
+        for value in set(values):
+            self.distinct.add(f"num:{value!r}")
+
+    def merge(self, other: "KeyStats"):
+        self.count += other.count
+        self.types.update(other.types)
+        self.categories.update(other.categories)
+        self.nulls += other.nulls
+        self.empties += other.empties
+        self.string_lengths.update(other.string_lengths)
+        self.string_min = _min(self.string_min, other.string_min)
+        self.string_max = _max(self.string_max, other.string_max)
+        self.string_total += other.string_total
+        self.string_count += other.string_count
+        self.numeric_min = _min(self.numeric_min, other.numeric_min)
+        self.numeric_max = _max(self.numeric_max, other.numeric_max)
+        self.numeric_total += other.numeric_total
+        self.numeric_count += other.numeric_count
+        self.distinct.merge(other.distinct)
+
+    def to_dict(self, records: int) -> dict:
+        result = {
+            "count": self.count,
+            "frequency": self.count / records if records else 0.0,
+            "types": dict(self.types),
+            "categories": dict(self.categories),
+            "nulls": self.nulls,
+            "empties": self.empties,
+        }
+        if self.string_count:
+            result["string_length"] = {
+                "min": self.string_min,
+                "max": self.string_max,
+                "mean": self.string_total / self.string_count,
+                # Bucket k counts strings with 2^(k-1) <= length < 2^k
+                "histogram": {
+                    f"<{1 << bucket}": self.string_lengths[bucket]
+                    for bucket in sorted(self.string_lengths)
+                },
+            }
+        if self.numeric_count:
+            result["numeric"] = {
+                "min": self.numeric_min,
+                "max": self.numeric_max,
+                "mean": self.numeric_total / self.numeric_count,
+            }
+        if self.string_count or self.numeric_count or "bool" in self.types:
+            result["distinct"] = self.distinct.estimate()
+        return result
+
+
+def _min(current, value):
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return min(current, value)
+
+
+def _max(current, value):
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return max(current, value)
+
+
+class Profile:
+    """Per-key-path statistics over a stream of records.
+
+    Nested dictionary keys are joined with dots and list items are profiled
+    under ``<path>[]``, including those packed into numeric arrays. Memory grows
+    with the number of distinct key paths, not with the number of records,
+    and profiles of separate chunks or files can be merged.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.keys: dict[str, KeyStats] = {}
+
+    def add_record(self, record):
+        self.records += 1
+        self._add(record, "")
+
+    def _add(self, value, path: str):
+        if path:
+            self._stats(path).add(value)
+
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self._add(item, f"{path}.{key}" if path else str(key))
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self._add(item, f"{path}[]")
+        elif isinstance(value, array):
+            self._stats(f"{path}[]").add_array(value)
+
+    def _stats(self, path: str) -> KeyStats:
+        stats = self.keys.get(path)
+        if stats is None:
+            stats = self.keys[path] = KeyStats()
+        return stats
+
+    def merge(self, other: "Profile") -> "Profile":
+        self.records += other.records
+        for path, stats in other.keys.items():
+            if path in self.keys:
+                self.keys[path].merge(stats)
+            else:
+                self.keys[path] = stats
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "records": self.records,
+            "keys": {
+                path: self.keys[path].to_dict(self.records)
+                for path in sorted(self.keys)
+            },
+        }
+
+
+def profile_records(records: Iterable) -> Profile:
+    profile = Profile()
+    for record in records:
+        profile.add_record(record)
+    return profile
+
+
+def profile_file(path: str) -> Profile:
+    """Profile one input file, streaming its records."""
+    with open(path, "r") as f:
+        data = f.read()
+    return profile_records(tokenizer.iter_records_with_tokenizer(data))
+
+
+def profile_files(paths: list[str], workers: int | None = None) -> Profile:
+    """Profile several input files on a process pool and merge the results.
+
+    Args:
+        paths: Input files to profile.
+        workers: Number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        The merged profile of all files.
+    """
+    if len(paths) == 1:
+        return profile_file(paths[0])
+
+    profile = Profile()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_profile in executor.map(profile_file, paths):
+            profile.merge(file_profile)
+    return profile
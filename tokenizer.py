@@ -1,10 +1,15 @@
 import io
 import itertools
 import json
+import random
+import re
 import token as tok
 import tokenize
+from array import array
 from typing import Generator
 
+from numeric_array import NUMERIC_ARRAY_MIN_LENGTH, to_numeric_array
+
 TOKEN_NAMES = {
     0: "ENDMARKER",
     1: "NAME",
@@ -76,11 +81,46 @@ TOKEN_NAMES = {
 
 
 class TokenGenerator:
-    def __init__(self, generator: Generator[tokenize.TokenInfo, None, None]):
-        self.generator = generator
+    """Token stream over a source string that can map tokens back to it.
+
+    The start offset of every line is recorded as the tokenizer reads it, so
+    values can be sliced straight out of the source instead of being rebuilt
+    from their tokens.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.line_offsets = array("q")
+        self.last_token = None
+        self.generator = tokenize.generate_tokens(self._readline())
+
+    def _readline(self):
+        stream = io.StringIO(self.source)
+        offset = 0
+
+        def readline() -> str:
+            nonlocal offset
+            line = stream.readline()
+            self.line_offsets.append(offset)
+            offset += len(line)
+            return line
+
+        return readline
+
+    def offset(self, position: tuple[int, int]) -> int:
+        """Convert a token `(row, col)` position into an offset in the source."""
+        row, col = position
+        return self.line_offsets[row - 1] + col
+
+    def slice(
+        self, start_token: tokenize.TokenInfo, end_token: tokenize.TokenInfo
+    ) -> str:
+        """Return the exact source text from `start_token` to `end_token`."""
+        return self.source[self.offset(start_token.start) : self.offset(end_token.end)]
 
     def next(self) -> tokenize.TokenInfo:
-        return next(self.generator)
+        self.last_token = next(self.generator)
+        return self.last_token
 
     def peek(self, offset: int) -> tokenize.TokenInfo:
         token_generator, peek_iter = itertools.tee(self.generator)
@@ -122,34 +162,31 @@ class TokenGenerator:
         return current_token
 
 
-VALUE_TYPES = str | int | float | list | set | dict | tuple | None | bool
+VALUE_TYPES = str | int | float | list | array | set | dict | tuple | None | bool
 
 
 def parse_object_value(
     token_generator: TokenGenerator,
 ):
-    stack = []
-    value = []
-    current_token = token_generator.next_and_expect(
+    start_token = token_generator.next_and_expect(
         expected_type=tok.OP, expected_string="<"
     )
-    stack.append(current_token.string)
-    value.append(current_token.string)
+    depth = 1
 
     while True:
         current_token = token_generator.next()
-        value.append(current_token.string)
+        if current_token.type != tok.OP:
+            continue
 
-        if current_token.type == tok.OP and current_token.string == ">":
-            stack.pop()
-            if len(stack) == 0:
+        # `<<` and `>>` are single tokens, e.g. in `<Foo <Bar>>`
+        if current_token.string in ("<", "<<"):
+            depth += len(current_token.string)
+        elif current_token.string in (">", ">>"):
+            depth -= len(current_token.string)
+            if depth <= 0:
                 break
 
-        if current_token.type == tok.OP and current_token.string == "<":
-            stack.append("<")
-            value.append("<")
-
-    return "".join(value)
+    return token_generator.slice(start_token, current_token)
 
 
 def parse_dict(
@@ -216,43 +253,38 @@ def parse_name(
     elif current_token.string == "True":
         return True
 
-    names = [current_token.string]
+    start_token = current_token
     stack = []
     while True:
         next_token = token_generator.peek(0)
         if next_token.type == tok.OP and next_token.string == ".":
-            names.append(next_token.string)
             token_generator.next()
         elif next_token.type == tok.NAME:
-            names.append(next_token.string)
             token_generator.next()
         elif next_token.type == tok.OP and next_token.string == "(":
             stack.append("(")
-            names.append(next_token.string)
             token_generator.next()
-        elif next_token.type == tok.OP and next_token.string == ")":
+        elif next_token.type == tok.OP and next_token.string == ")" and stack:
             stack.pop()
-            names.append(next_token.string)
             token_generator.next()
             if len(stack) == 0:
                 break
         elif len(stack) > 0:
-            # append everything
-            names.append(next_token.string)
+            # include everything inside the call
             token_generator.next()
         else:
             break
 
-    return "".join(names)
+    return token_generator.slice(start_token, token_generator.last_token)
 
 
-def parse_list(
+def iter_list(
     token_generator: TokenGenerator,
-):
+    with_spans: bool = False,
+) -> Generator[VALUE_TYPES, None, None]:
+    """Yield the items of a list, optionally with their `(start, end)` offsets."""
     token_generator.next_and_expect(expected_type=tok.OP, expected_string="[")
 
-    data = []
-
     while True:
         next_token = token_generator.peek(0)
         if next_token.type == tok.OP and next_token.string == "]":
@@ -262,8 +294,25 @@ def parse_list(
             token_generator.next()
             continue
 
-        current_value = parse_value(token_generator)
-        data.append(current_value)
+        if with_spans:
+            start = token_generator.offset(next_token.start)
+            value = parse_value(token_generator)
+            end = token_generator.offset(token_generator.last_token.end)
+            yield value, (start, end)
+        else:
+            yield parse_value(token_generator)
+
+
+def parse_list(
+    token_generator: TokenGenerator,
+):
+    data = list(iter_list(token_generator))
+
+    # Long homogeneous numeric lists are stored compactly
+    if len(data) >= NUMERIC_ARRAY_MIN_LENGTH:
+        packed = to_numeric_array(data)
+        if packed is not None:
+            return packed
 
     return data
 
@@ -354,8 +403,7 @@ def parse_value(
 
 def tokenize_raw(data: str, output_file: str):
     dict_str = data.strip() + "\n"
-    readline = io.StringIO(dict_str).readline
-    token_generator = TokenGenerator(tokenize.generate_tokens(readline))
+    token_generator = TokenGenerator(dict_str)
 
     with open(output_file, "w") as f:
         for token in token_generator.generator:
@@ -374,14 +422,208 @@ def tokenize_raw(data: str, output_file: str):
 
 def parse_dict_with_tokenizer(data: str):
     dict_str = data.strip() + "\n"
-    readline = io.StringIO(dict_str).readline
-    token_generator = TokenGenerator(tokenize.generate_tokens(readline))
+    token_generator = TokenGenerator(dict_str)
 
     data = parse_list(token_generator)
 
     return data
 
 
+def iter_records_with_tokenizer(
+    data: str, with_spans: bool = False
+) -> Generator[VALUE_TYPES, None, None]:
+    """Parse the top-level list lazily, yielding one record at a time.
+
+    Tokens are only produced as records are consumed, so callers that stream
+    the records never hold the whole parsed list in memory.
+
+    Args:
+        data: Raw repr text of the top-level list.
+        with_spans: Yield `(record, (start, end))` pairs, where the offsets
+            locate the record's source text in `data`.
+    """
+    dict_str = data.strip() + "\n"
+    token_generator = TokenGenerator(dict_str)
+
+    if not with_spans:
+        yield from iter_list(token_generator)
+        return
+
+    lead = len(data) - len(data.lstrip())
+    for record, (start, end) in iter_list(token_generator, with_spans=True):
+        yield record, (start + lead, end + lead)
+
+
+# Structural characters of a repr, with quoted strings matched whole so the
+# brackets and commas inside them are skipped
+STRUCTURE_RE = re.compile(r"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|[\[\](){}<>,]""")
+
+# The same on reversed text, where an escaped quote is one followed by an odd
+# number of backslashes. A lone quote means a string is cut off.
+REVERSED_STRUCTURE_RE = re.compile(
+    r"""'(?:[^'\n]|'(?=\\(?:\\\\)*(?!\\)))*'"""
+    r"""|"(?:[^"\n]|"(?=\\(?:\\\\)*(?!\\)))*"|['"]|[\[\](){}<>,]"""
+)
+
+OPENING_BRACKETS = "[({<"
+CLOSING_BRACKETS = "])}>"
+
+# Initial size of the tail window scanned by `find_last_element_spans`
+TAIL_WINDOW = 1 << 16
+
+
+def iter_element_spans(data: str) -> Generator[tuple[int, int], None, None]:
+    """Yield the `(start, end)` offsets of each element of the top-level list.
+
+    Only bracket depth is tracked, which is much cheaper than tokenizing, so
+    elements can be skipped without parsing them.
+    """
+    depth = 0
+    start = None
+    for match in STRUCTURE_RE.finditer(data):
+        char = match.group()[0]
+        if char in OPENING_BRACKETS:
+            depth += 1
+            if depth == 1:
+                start = match.end()
+        elif char in CLOSING_BRACKETS:
+            depth -= 1
+            if depth == 0:
+                if data[start : match.start()].strip():
+                    yield start, match.start()
+                return
+        elif char == "," and depth == 1:
+            if data[start : match.start()].strip():
+                yield start, match.start()
+            start = match.end()
+
+
+def _scan_last_element_spans(
+    data: str, window_start: int, count: int
+) -> list[tuple[int, int]] | None:
+    reversed_data = data[window_start:][::-1]
+    last = len(data) - 1
+
+    spans = []
+    depth = 0
+    end = None
+    for match in REVERSED_STRUCTURE_RE.finditer(reversed_data):
+        token = match.group()
+        position = last - match.start()
+        if len(token) == 1 and token in "'\"":
+            if window_start > 0:
+                return None  # cut off inside a string, retry with a wider window
+            continue
+
+        char = token[0]
+        if char in CLOSING_BRACKETS:
+            depth += 1
+            if depth == 1:
+                end = position
+        elif char in OPENING_BRACKETS:
+            depth -= 1
+            if depth == 0:
+                if data[position + 1 : end].strip():
+                    spans.append((position + 1, end))
+                return spans[::-1]
+        elif char == "," and depth == 1:
+            if data[position + 1 : end].strip():
+                spans.append((position + 1, end))
+                if len(spans) == count:
+                    return spans[::-1]
+            end = position
+
+    return None if window_start > 0 else spans[::-1]
+
+
+def find_last_element_spans(data: str, count: int) -> list[tuple[int, int]]:
+    """Find the offsets of the last `count` elements of the top-level list.
+
+    Scans backwards from the end of the data, starting with a small window
+    that grows until enough element boundaries are found.
+    """
+    if count <= 0:
+        return []
+
+    window = TAIL_WINDOW
+    while True:
+        window_start = max(0, len(data) - window)
+        spans = _scan_last_element_spans(data, window_start, count)
+        if spans is not None:
+            return spans
+        window *= 4
+
+
+def parse_value_with_tokenizer(data: str) -> VALUE_TYPES:
+    """Parse a single value, such as one element of the top-level list."""
+    return parse_value(TokenGenerator(data.strip() + "\n"))
+
+
+def _parse_span(data: str, start: int, end: int, with_spans: bool):
+    text = data[start:end]
+    value = parse_value_with_tokenizer(text)
+    if not with_spans:
+        return value
+    start += len(text) - len(text.lstrip())
+    end -= len(text) - len(text.rstrip())
+    return value, (start, end)
+
+
+def iter_head_records(
+    data: str, count: int, with_spans: bool = False
+) -> Generator[VALUE_TYPES, None, None]:
+    """Yield the first `count` records, lexing no further than needed."""
+    yield from itertools.islice(iter_records_with_tokenizer(data, with_spans), count)
+
+
+def iter_tail_records(
+    data: str, count: int, with_spans: bool = False
+) -> Generator[VALUE_TYPES, None, None]:
+    """Yield the last `count` records without parsing the ones before them."""
+    for start, end in find_last_element_spans(data, count):
+        yield _parse_span(data, start, end, with_spans)
+
+
+def iter_sample_records(
+    data: str, rate: float, seed: int | None = None, with_spans: bool = False
+) -> Generator[VALUE_TYPES, None, None]:
+    """Yield a random sample of the records, each kept with probability `rate`.
+
+    Records that are not selected are skipped by bracket matching only.
+    """
+    rng = random.Random(seed)
+    for start, end in iter_element_spans(data):
+        if rng.random() < rate:
+            yield _parse_span(data, start, end, with_spans)
+
+
+def spans_to_positions(
+    data: str, spans: list[tuple[int, int]]
+) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """Convert ascending `(start, end)` offsets into 1-based `(line, column)` pairs.
+
+    Each span gives the position of its first and of its last character.
+    The text is scanned once, so this stays linear on single-line dumps.
+    """
+    positions = []
+    line = 1
+    line_start = 0
+    position = 0
+
+    def advance(target: int) -> tuple[int, int]:
+        nonlocal line, line_start, position
+        newlines = data.count("\n", position, target)
+        if newlines:
+            line += newlines
+            line_start = data.rfind("\n", position, target) + 1
+        position = target
+        return line, target - line_start + 1
+
+    for start, end in spans:
+        positions.append((advance(start), advance(end - 1)))
+    return positions
+
+
 def print_token(token: tokenize.TokenInfo):
     print(
         {